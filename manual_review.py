@@ -23,10 +23,10 @@ async def main():
     with open(diff_path, "r") as f:
         raw_diff = f.read()
 
-    # 2. Parse the diff
+    # 2. Parse the diff in a worker thread while the reviewer starts up
     print("🔍 Parsing diff...")
-    chunks = parse_diff(raw_diff)
-    print(f"   Found {len(chunks)} chunks to review.")
+    # run_in_executor submits right away, so parsing overlaps the setup below
+    parse_future = asyncio.get_running_loop().run_in_executor(None, parse_diff, raw_diff)
 
     # 3. Initialize LLM Reviewer
     # Note: This requires GROQ_API_KEY to be set in .env
@@ -38,10 +38,13 @@ async def main():
         print("   Make sure GROQ_API_KEY is set in your .env file")
         return
 
+    chunks = await parse_future
+    print(f"   Found {len(chunks)} chunks to review.")
+
     # 4. Run the review
     print("🧠 Analyzing code with AI... (this may take a few seconds)")
     try:
-        review = reviewer.review_pr(chunks)
+        review = await reviewer.review_pr(chunks)
     except Exception as e:
         print(f"❌ Error during review: {e}")
         return
@@ -1,44 +1,63 @@
 """FastAPI webhook server for GitHub PR events."""
 
-import hashlib
+import asyncio
 import hmac
 import logging
-from collections import deque
-from contextlib import asynccontextmanager
+from contextlib import aclosing, asynccontextmanager
 from datetime import datetime
 from time import time as monotonic_time
 
+import orjson
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 
-from src.config import get_settings
+from src.config import Settings, get_settings
 from src.github_client import GitHubClient
-from src.diff_parser import parse_diff
+from src.diff_parser import parse_diff_stream
 from src.llm_reviewer import LLMReviewer
 from src.comment_formatter import format_summary_comment, format_inline_comments
 from src.db import ReviewDatabase
+from src.models import PRReview
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+settings: Settings | None = None
 github_client: GitHubClient | None = None
 review_db: ReviewDatabase | None = None
+llm_reviewer: LLMReviewer | None = None
 
-# Simple rate limiter: timestamps of recent reviews
-_review_timestamps: deque[float] = deque(maxlen=10)
+# Simple fixed-window rate limiter: reviews started in the current minute
+_window_start = 0.0
+_window_count = 0
 MAX_REVIEWS_PER_MINUTE = 10
 
+# Webhook bodies larger than this are hashed in a worker thread so a big
+# PR payload doesn't stall the event loop during signature verification.
+SIGNATURE_THREAD_THRESHOLD = 64 * 1024
+
+# Dashboard query results are shared between requests for a few seconds,
+# since every open dashboard tab auto-refreshes.
+DASHBOARD_CACHE_TTL = 5.0
+_dashboard_cache: tuple[float, list[dict], dict] | None = None
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global github_client, review_db
-    github_client = GitHubClient()
+    global settings, github_client, review_db, llm_reviewer
+    settings = get_settings()
     review_db = ReviewDatabase()
+    github_client = GitHubClient(etag_cache=review_db)
+    llm_reviewer = LLMReviewer()
     logger.info("AI Code Review Agent started ✅")
     logger.info(f"Dashboard DB: {review_db.db_path}")
     yield
     if github_client:
         await github_client.close()
+    if llm_reviewer:
+        await llm_reviewer.client.close()
+    if review_db:
+        review_db.close()
 
 
 app = FastAPI(
@@ -46,32 +65,15 @@ app = FastAPI(
     description="Automated PR code review powered by LLMs",
     version="1.1.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     redoc_url="/redoc",
     docs_url="/docs",
 )
 
 
-def verify_signature(payload: bytes, signature: str, secret: str) -> bool:
-    """Verify GitHub webhook signature."""
-    expected = "sha256=" + hmac.HMAC(
-        secret.encode(), payload, hashlib.sha256
-    ).hexdigest()
-    return hmac.compare_digest(expected, signature)
-
-
-def _is_rate_limited() -> bool:
-    """Check if we've exceeded the review rate limit."""
-    now = monotonic_time()
-    # Remove timestamps older than 60 seconds
-    while _review_timestamps and now - _review_timestamps[0] > 60:
-        _review_timestamps.popleft()
-    return len(_review_timestamps) >= MAX_REVIEWS_PER_MINUTE
-
-
-@app.get("/")
-async def root():
-    """Welcome page with links to all endpoints."""
-    html = """
+# Static page markup is built once at import time; handlers only fill in
+# the dynamic parts.
+_ROOT_HTML = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -126,43 +128,9 @@ async def root():
         </p>
     </body>
     </html>
-    """
-    return HTMLResponse(content=html)
-
-
-@app.get("/health")
-async def health():
-    return {"status": "healthy", "service": "ai-code-review-agent"}
-
-
-@app.get("/dashboard")
-async def dashboard():
-    """Web dashboard showing recent reviews (persisted in SQLite)."""
-    reviews = review_db.get_recent_reviews(limit=50)
-    stats = review_db.get_stats()
-
-    # Generate table rows
-    rows = ""
-    if not reviews:
-        rows = "<tr><td colspan='6' style='text-align: center; color: #8b949e;'>No reviews yet. Create a PR to see reviews here!</td></tr>"
-    else:
-        for review in reviews:
-            score = review["score"]
-            score_color = "#238636" if score >= 7 else "#d29922" if score >= 4 else "#da3633"
-            ts = review["timestamp"]
-            time_display = ts.split("T")[1].split(".")[0] if "T" in ts else ts
-            rows += f"""
-            <tr>
-                <td>{time_display}</td>
-                <td><a href="{review['pr_url']}" target="_blank">{review['repo']}#{review['pr_number']}</a></td>
-                <td style="color: {score_color}; font-weight: bold;">{score}/10</td>
-                <td>{review['total_issues']}</td>
-                <td style="color: #da3633;">{review['critical']}</td>
-                <td style="color: #d29922;">{review['warnings']}</td>
-            </tr>
-            """
+"""
 
-    html = f"""
+_DASHBOARD_TEMPLATE = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -191,15 +159,15 @@ async def dashboard():
         
         <div class="stats">
             <div class="stat-card">
-                <div class="stat-value">{stats['total_reviews']}</div>
+                <div class="stat-value">{total_reviews}</div>
                 <div class="stat-label">Total Reviews</div>
             </div>
             <div class="stat-card">
-                <div class="stat-value">{stats['total_issues']}</div>
+                <div class="stat-value">{total_issues}</div>
                 <div class="stat-label">Issues Found</div>
             </div>
             <div class="stat-card">
-                <div class="stat-value">{stats['avg_score']}</div>
+                <div class="stat-value">{avg_score}</div>
                 <div class="stat-label">Average Score</div>
             </div>
         </div>
@@ -228,20 +196,152 @@ async def dashboard():
         </p>
     </body>
     </html>
-    """
+"""
+
+_EMPTY_ROW_HTML = (
+    "<tr><td colspan='6' style='text-align: center; color: #8b949e;'>"
+    "No reviews yet. Create a PR to see reviews here!</td></tr>"
+)
+
+_ROW_TEMPLATE = """
+            <tr>
+                <td>{time_display}</td>
+                <td><a href="{pr_url}" target="_blank">{repo}#{pr_number}</a></td>
+                <td style="color: {score_color}; font-weight: bold;">{score}/10</td>
+                <td>{total_issues}</td>
+                <td style="color: #da3633;">{critical}</td>
+                <td style="color: #d29922;">{warnings}</td>
+            </tr>
+            """
+
+
+def _render_review_row(review: dict) -> str:
+    """Render a single dashboard table row."""
+    score = review["score"]
+    score_color = "#238636" if score >= 7 else "#d29922" if score >= 4 else "#da3633"
+    ts = review["timestamp"]
+    time_display = ts.split("T")[1].split(".")[0] if "T" in ts else ts
+    return _ROW_TEMPLATE.format(
+        time_display=time_display,
+        pr_url=review["pr_url"],
+        repo=review["repo"],
+        pr_number=review["pr_number"],
+        score_color=score_color,
+        score=score,
+        total_issues=review["total_issues"],
+        critical=review["critical"],
+        warnings=review["warnings"],
+    )
+
+
+def verify_signature(payload: bytes, signature: str, secret: bytes) -> bool:
+    """Verify GitHub webhook signature."""
+    expected = "sha256=" + hmac.new(secret, payload, "sha256").hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+async def _verify_signature_async(payload: bytes, signature: str, secret: bytes) -> bool:
+    """Verify a webhook signature, offloading large payloads to a thread."""
+    if len(payload) > SIGNATURE_THREAD_THRESHOLD:
+        return await asyncio.to_thread(verify_signature, payload, signature, secret)
+    return verify_signature(payload, signature, secret)
+
+
+def _get_dashboard_data() -> tuple[list[dict], dict]:
+    """Return recent reviews and stats, re-querying at most every DASHBOARD_CACHE_TTL seconds."""
+    global _dashboard_cache
+    now = monotonic_time()
+    if _dashboard_cache and now - _dashboard_cache[0] < DASHBOARD_CACHE_TTL:
+        return _dashboard_cache[1], _dashboard_cache[2]
+    reviews = review_db.get_recent_reviews(limit=50)
+    stats = review_db.get_stats()
+    _dashboard_cache = (now, reviews, stats)
+    return reviews, stats
+
+
+def _is_rate_limited() -> bool:
+    """Check if we've exceeded the review rate limit; counts the review if not."""
+    global _window_start, _window_count
+    now = monotonic_time()
+    if now - _window_start >= 60:
+        _window_start = now
+        _window_count = 0
+    if _window_count >= MAX_REVIEWS_PER_MINUTE:
+        return True
+    _window_count += 1
+    return False
+
+
+@app.get("/")
+async def root():
+    """Welcome page with links to all endpoints."""
+    return HTMLResponse(content=_ROOT_HTML)
+
+
+@app.get("/health")
+async def health():
+    return {"status": "healthy", "service": "ai-code-review-agent"}
+
+
+@app.get("/dashboard")
+async def dashboard():
+    """Web dashboard showing recent reviews (persisted in SQLite)."""
+    reviews, stats = _get_dashboard_data()
+
+    if reviews:
+        rows = "".join(_render_review_row(review) for review in reviews)
+    else:
+        rows = _EMPTY_ROW_HTML
+
+    html = _DASHBOARD_TEMPLATE.format(
+        rows=rows,
+        total_reviews=stats["total_reviews"],
+        total_issues=stats["total_issues"],
+        avg_score=stats["avg_score"],
+    )
     return HTMLResponse(content=html)
 
 
+async def _post_review(owner: str, repo_name: str, pr_number: int, review: PRReview):
+    """Post a review to GitHub, falling back to a plain comment."""
+    summary = format_summary_comment(review)
+    inline_comments = format_inline_comments(review)
+
+    if inline_comments:
+        review_event = (
+            "REQUEST_CHANGES" if review.critical_count > 0 else "COMMENT"
+        )
+        try:
+            await github_client.create_review(
+                owner, repo_name, pr_number, summary, inline_comments, review_event
+            )
+        except Exception as e:
+            logger.warning(
+                f"Inline review failed ({e}), falling back to plain comment"
+            )
+            await github_client.post_comment(owner, repo_name, pr_number, summary)
+    else:
+        await github_client.post_comment(owner, repo_name, pr_number, summary)
+
+
 @app.post("/webhook")
 async def handle_webhook(request: Request):
     """Handle incoming GitHub webhook events."""
-    settings = get_settings()
+    global _dashboard_cache
+
+    # Only pull_request events are reviewed; skip everything else before
+    # reading or verifying the (possibly large) body.
+    event = request.headers.get("X-GitHub-Event", "")
+    if event != "pull_request":
+        return {"status": "ignored", "reason": f"Event type: {event}"}
 
     # Verify webhook signature
     body = await request.body()
     if settings.github_webhook_secret:
         signature = request.headers.get("X-Hub-Signature-256", "")
-        if not verify_signature(body, signature, settings.github_webhook_secret):
+        if not await _verify_signature_async(
+            body, signature, settings.github_webhook_secret_bytes
+        ):
             raise HTTPException(status_code=401, detail="Invalid signature")
     else:
         logger.warning(
@@ -249,12 +349,11 @@ async def handle_webhook(request: Request):
             "Set it in .env for production use."
         )
 
-    payload = await request.json()
-    event = request.headers.get("X-GitHub-Event", "")
-
-    if event != "pull_request":
-        return {"status": "ignored", "reason": f"Event type: {event}"}
-
+    # Parse the body we already read for the signature check
+    try:
+        payload = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
     action = payload.get("action", "")
     if action not in ("opened", "synchronize", "reopened"):
         return {"status": "ignored", "reason": f"Action: {action}"}
@@ -263,7 +362,6 @@ async def handle_webhook(request: Request):
     if _is_rate_limited():
         logger.warning("Rate limit exceeded, skipping review")
         return {"status": "rate_limited", "reason": "Too many reviews per minute"}
-    _review_timestamps.append(monotonic_time())
 
     # Extract PR info
     pr = payload["pull_request"]
@@ -275,69 +373,62 @@ async def handle_webhook(request: Request):
         raise HTTPException(status_code=400, detail=f"Invalid repository name: {full_name}")
     owner, repo_name = full_name.split("/", 1)
 
-    # Deduplication: skip if this exact commit was already reviewed
-    if review_db and review_db.has_reviewed_commit(full_name, pr_number, commit_sha):
+    # Deduplication: atomically claim this commit, skip if already reviewed
+    review_id = review_db.try_claim_review(
+        timestamp=datetime.now().isoformat(),
+        repo=full_name,
+        pr_number=pr_number,
+        pr_url=f"https://github.com/{full_name}/pull/{pr_number}",
+        commit_sha=commit_sha,
+    )
+    if review_id is None:
         logger.info(f"Skipping PR #{pr_number} — commit {commit_sha[:8]} already reviewed")
         return {"status": "already_reviewed", "commit": commit_sha[:8]}
 
     logger.info(f"Reviewing PR #{pr_number} on {owner}/{repo_name} (commit {commit_sha[:8]})")
 
     try:
-        # 1. Fetch the diff
-        raw_diff = await github_client.get_pr_diff(owner, repo_name, pr_number)
-
-        # 2. Parse the diff
-        chunks = parse_diff(raw_diff, settings.supported_languages)
+        # 1-2. Fetch and parse the diff, stopping once the file limit is reached
+        async with aclosing(
+            github_client.stream_pr_diff(owner, repo_name, pr_number)
+        ) as diff_lines:
+            chunks = await parse_diff_stream(
+                diff_lines,
+                settings.supported_languages,
+                max_chunks=settings.max_files_per_review,
+            )
         if not chunks:
+            review_db.release_review(review_id)
             return {"status": "skipped", "reason": "No reviewable files"}
 
-        # Limit files
-        chunks = chunks[: settings.max_files_per_review]
-
         # 3. Run LLM review
-        reviewer = LLMReviewer()
-        review = reviewer.review_pr(chunks)
+        review = await llm_reviewer.review_pr(chunks)
         review.pr_number = pr_number
         review.repo_full_name = repo["full_name"]
 
-        # 4. Post results
-        summary = format_summary_comment(review)
-        inline_comments = format_inline_comments(review)
-
-        if inline_comments:
-            review_event = (
-                "REQUEST_CHANGES" if review.critical_count > 0 else "COMMENT"
-            )
-            try:
-                await github_client.create_review(
-                    owner, repo_name, pr_number, summary, inline_comments, review_event
-                )
-            except Exception as e:
-                logger.warning(
-                    f"Inline review failed ({e}), falling back to plain comment"
-                )
-                await github_client.post_comment(owner, repo_name, pr_number, summary)
-        else:
-            await github_client.post_comment(owner, repo_name, pr_number, summary)
-
-        logger.info(
-            f"Review posted for PR #{pr_number}: "
-            f"{review.total_issues} issues, score {review.overall_score}/10"
-        )
-
-        # 5. Persist review to SQLite
-        if review_db:
-            review_db.save_review(
+        # 4. Post results and persist the review to SQLite concurrently
+        results = await asyncio.gather(
+            _post_review(owner, repo_name, pr_number, review),
+            asyncio.to_thread(
+                review_db.finalize_review,
+                review_id,
                 timestamp=datetime.now().isoformat(),
-                repo=review.repo_full_name,
-                pr_number=pr_number,
-                pr_url=f"https://github.com/{review.repo_full_name}/pull/{pr_number}",
                 score=review.overall_score,
                 total_issues=review.total_issues,
                 critical=review.critical_count,
                 warnings=review.warning_count,
-                commit_sha=commit_sha,
-            )
+            ),
+            return_exceptions=True,
+        )
+        _dashboard_cache = None
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+
+        logger.info(
+            f"Review posted for PR #{pr_number}: "
+            f"{review.total_issues} issues, score {review.overall_score}/10"
+        )
 
         return {
             "status": "reviewed",
@@ -348,6 +439,7 @@ async def handle_webhook(request: Request):
 
     except Exception as e:
         logger.error(f"Review failed for PR #{pr_number}: {e}")
+        review_db.release_review(review_id)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -12,50 +12,52 @@ SEVERITY_EMOJI = {
 
 def format_summary_comment(review: PRReview) -> str:
     """Format the top-level summary comment for a PR."""
-    score_bar = "🟢" * int(review.overall_score) + "⚫" * (10 - int(review.overall_score))
+    score_int = int(review.overall_score)
+    score_bar = "🟢" * score_int + "⚫" * (10 - score_int)
 
-    lines = [
-        "## 🤖 AI Code Review Summary\n",
-        f"**Quality Score**: {review.overall_score}/10 {score_bar}\n",
-        "| Metric | Count |",
-        "|--------|-------|",
-        f"| Total Issues | {review.total_issues} |",
-        f"| 🔴 Critical | {review.critical_count} |",
-        f"| 🟡 Warnings | {review.warning_count} |",
-        f"| Files Reviewed | {len(review.file_reviews)} |\n",
-    ]
-
-    if review.summary:
-        lines.append(f"\n**Summary**: {review.summary}\n")
+    summary_section = f"\n**Summary**: {review.summary}\n\n" if review.summary else ""
 
     # Per-file breakdown
+    file_section = ""
     if review.file_reviews:
-        lines.append("\n### 📁 File Breakdown\n")
-        for fr in review.file_reviews:
-            issue_count = len(fr.issues)
-            status = "✅" if issue_count == 0 else f"⚠️ {issue_count} issue(s)"
-            lines.append(f"- `{fr.file_path}` — {status}")
+        file_lines = "\n".join(
+            f"- `{fr.file_path}` — {'✅' if not fr.issues else f'⚠️ {len(fr.issues)} issue(s)'}"
+            for fr in review.file_reviews
+        )
+        file_section = f"\n### 📁 File Breakdown\n\n{file_lines}\n"
 
     # Add link to view full review on GitHub
     pr_url = f"https://github.com/{review.repo_full_name}/pull/{review.pr_number}"
-    lines.append(f"\n[📋 View detailed review on GitHub]({pr_url}/files)")
-    lines.append("\n---\n*Powered by AI Code Review Agent* 🤖")
-    return "\n".join(lines)
+    return f"""## 🤖 AI Code Review Summary
+
+**Quality Score**: {review.overall_score}/10 {score_bar}
+
+| Metric | Count |
+|--------|-------|
+| Total Issues | {review.total_issues} |
+| 🔴 Critical | {review.critical_count} |
+| 🟡 Warnings | {review.warning_count} |
+| Files Reviewed | {len(review.file_reviews)} |
+
+{summary_section}{file_section}
+[📋 View detailed review on GitHub]({pr_url}/files)
+
+---
+*Powered by AI Code Review Agent* 🤖"""
 
 
 def format_inline_comments(review: PRReview) -> list[dict]:
     """Format issues as GitHub inline review comments."""
-    comments = []
-    for fr in review.file_reviews:
-        for issue in fr.issues:
-            body = _format_issue_comment(issue)
-            comments.append({
-                "path": issue.file_path,
-                "line": issue.line_end,
-                "side": "RIGHT",
-                "body": body,
-            })
-    return comments
+    return [
+        {
+            "path": issue.file_path,
+            "line": issue.line_end,
+            "side": "RIGHT",
+            "body": _format_issue_comment(issue),
+        }
+        for fr in review.file_reviews
+        for issue in fr.issues
+    ]
 
 
 def _format_issue_comment(issue: ReviewIssue) -> str:
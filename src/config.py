@@ -1,5 +1,7 @@
 """Application configuration using pydantic-settings."""
 
+from functools import cached_property, lru_cache
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 from typing import Optional
@@ -29,9 +31,16 @@ class Settings(BaseSettings):
         env="REVIEW_LANGUAGES"
     )
 
-    @property
-    def supported_languages(self) -> list[str]:
-        return [lang.strip() for lang in self.review_languages.split(",")]
+    @cached_property
+    def github_webhook_secret_bytes(self) -> Optional[bytes]:
+        """Webhook secret encoded once for HMAC verification."""
+        if self.github_webhook_secret is None:
+            return None
+        return self.github_webhook_secret.encode("utf-8")
+
+    @cached_property
+    def supported_languages(self) -> frozenset[str]:
+        return frozenset(lang.strip() for lang in self.review_languages.split(","))
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -39,5 +48,7 @@ class Settings(BaseSettings):
     )
 
 
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
+    """Load settings from the environment and .env once per process."""
     return Settings()
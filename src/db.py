@@ -2,6 +2,11 @@
 
 import sqlite3
 import logging
+import threading
+import zlib
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -9,18 +14,47 @@ logger = logging.getLogger(__name__)
 DB_DIR = Path(__file__).parent.parent / "data"
 DB_PATH = DB_DIR / "reviews.db"
 
+# An in-progress claim older than this is assumed to belong to a process
+# that died mid-review, and a redelivery may take it over
+STALE_CLAIM_SECONDS = 15 * 60
+
+INSERT_REVIEW_SQL = """
+    INSERT INTO reviews
+        (timestamp, repo, pr_number, pr_url, score, total_issues, critical, warnings, commit_sha)
+    VALUES
+        (:timestamp, :repo, :pr_number, :pr_url, :score, :total_issues, :critical, :warnings, :commit_sha)
+"""
+
+# commit_sha != '' matches the partial idx_reviews_claim index, so the
+# lookup is answered from that index alone
+HAS_REVIEWED_COMMIT_SQL = """
+    SELECT 1 FROM reviews
+    WHERE repo = ? AND pr_number = ? AND commit_sha = ? AND commit_sha != ''
+    LIMIT 1
+"""
+
 
 class ReviewDatabase:
     """Persistent storage for code review results using SQLite."""
 
-    def __init__(self, db_path: Path = DB_PATH):
+    def __init__(self, db_path: Path = DB_PATH, pragmas: dict | None = None):
         self.db_path = db_path
+        # Extra PRAGMAs applied to the connection, e.g. {"temp_store": "MEMORY"}
+        self.pragmas = pragmas or {}
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # One connection shared by all calls (including worker threads),
+        # serialized by a lock.
+        self._lock = threading.Lock()
+        self._conn = self._connect()
         self._init_db()
 
     def _init_db(self):
         """Create the reviews table if it doesn't exist."""
-        with self._connect() as conn:
+        # WAL lets dashboard reads run alongside writes; the mode is
+        # stored in the database file, so setting it once is enough.
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._transaction() as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS reviews (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -32,24 +66,80 @@ class ReviewDatabase:
                     total_issues INTEGER NOT NULL DEFAULT 0,
                     critical INTEGER NOT NULL DEFAULT 0,
                     warnings INTEGER NOT NULL DEFAULT 0,
-                    commit_sha TEXT DEFAULT ''
+                    commit_sha TEXT DEFAULT '',
+                    status TEXT NOT NULL DEFAULT 'completed'
                 )
             """)
+            # Databases created before review claiming lack the status column
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(reviews)")}
+            if "status" not in columns:
+                conn.execute(
+                    "ALTER TABLE reviews ADD COLUMN status TEXT NOT NULL DEFAULT 'completed'"
+                )
+            # idx_reviews_claim below covers every commit lookup, so the older
+            # indexes would only add write cost
+            conn.execute("DROP INDEX IF EXISTS idx_reviews_repo_pr")
+            conn.execute("DROP INDEX IF EXISTS idx_reviews_commit")
+            conn.execute("DROP INDEX IF EXISTS idx_reviews_commit_lookup")
+            # One review per (repo, PR, commit); lets try_claim_review dedupe atomically
+            has_claim_index = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_reviews_claim'"
+            ).fetchone()
+            if not has_claim_index:
+                # The old check-then-insert dedup was racy, so older databases
+                # can hold duplicate commits; keep the newest row of each
+                conn.execute("""
+                    DELETE FROM reviews
+                    WHERE commit_sha != ''
+                      AND id NOT IN (
+                          SELECT MAX(id) FROM reviews
+                          WHERE commit_sha != ''
+                          GROUP BY repo, pr_number, commit_sha
+                      )
+                """)
             conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_reviews_repo_pr
-                ON reviews (repo, pr_number)
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_reviews_claim
+                ON reviews (repo, pr_number, commit_sha)
+                WHERE commit_sha != ''
             """)
+            # Conditional-request cache for GitHub API responses
             conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_reviews_commit
-                ON reviews (commit_sha)
+                CREATE TABLE IF NOT EXISTS etags (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT NOT NULL,
+                    body BLOB NOT NULL
+                )
             """)
 
     def _connect(self) -> sqlite3.Connection:
         """Create a database connection."""
-        conn = sqlite3.connect(str(self.db_path))
+        conn = sqlite3.connect(
+            str(self.db_path), check_same_thread=False, isolation_level=None
+        )
         conn.row_factory = sqlite3.Row
+        # In WAL mode NORMAL only syncs at checkpoints, which is safe from corruption
+        conn.execute("PRAGMA synchronous=NORMAL")
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
         return conn
 
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run the enclosed writes in one explicit transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
     def save_review(
         self,
         timestamp: str,
@@ -63,22 +153,102 @@ class ReviewDatabase:
         commit_sha: str = "",
     ) -> int:
         """Save a review to the database. Returns the row ID."""
-        with self._connect() as conn:
+        with self._transaction() as conn:
             cursor = conn.execute(
+                INSERT_REVIEW_SQL,
+                {
+                    "timestamp": timestamp,
+                    "repo": repo,
+                    "pr_number": pr_number,
+                    "pr_url": pr_url,
+                    "score": score,
+                    "total_issues": total_issues,
+                    "critical": critical,
+                    "warnings": warnings,
+                    "commit_sha": commit_sha,
+                },
+            )
+            return cursor.lastrowid
+
+    def save_reviews_bulk(self, rows: list[dict]) -> None:
+        """Save many reviews in a single transaction.
+
+        Each row takes the same keys as save_review's arguments.
+        """
+        with self._transaction() as conn:
+            conn.executemany(
+                INSERT_REVIEW_SQL, [{"commit_sha": "", **row} for row in rows]
+            )
+
+    def try_claim_review(
+        self,
+        timestamp: str,
+        repo: str,
+        pr_number: int,
+        pr_url: str,
+        commit_sha: str,
+        stale_after: float = STALE_CLAIM_SECONDS,
+    ) -> int | None:
+        """Reserve a review slot for a commit.
+
+        Returns the new row ID, or None if this commit was already claimed.
+        The check and the insert happen in a single statement, so duplicate
+        webhook deliveries can't both pass. An in-progress claim made more
+        than stale_after seconds before timestamp is replaced.
+        """
+        cutoff = (datetime.fromisoformat(timestamp) - timedelta(seconds=stale_after)).isoformat()
+        with self._transaction() as conn:
+            conn.execute(
                 """
-                INSERT INTO reviews
-                    (timestamp, repo, pr_number, pr_url, score, total_issues, critical, warnings, commit_sha)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                DELETE FROM reviews
+                WHERE repo = ? AND pr_number = ? AND commit_sha = ?
+                  AND status = 'in_progress' AND timestamp < ?
                 """,
-                (timestamp, repo, pr_number, pr_url, score, total_issues, critical, warnings, commit_sha),
+                (repo, pr_number, commit_sha, cutoff),
             )
-            return cursor.lastrowid
+            rows = conn.execute(
+                """
+                INSERT OR IGNORE INTO reviews
+                    (timestamp, repo, pr_number, pr_url, score, commit_sha, status)
+                VALUES (?, ?, ?, ?, 0, ?, 'in_progress')
+                RETURNING id
+                """,
+                (timestamp, repo, pr_number, pr_url, commit_sha),
+            ).fetchall()
+        return rows[0]["id"] if rows else None
+
+    def finalize_review(
+        self,
+        review_id: int,
+        timestamp: str,
+        score: float,
+        total_issues: int,
+        critical: int,
+        warnings: int,
+    ) -> None:
+        """Record the results of a claimed review."""
+        with self._transaction() as conn:
+            conn.execute(
+                """
+                UPDATE reviews
+                SET timestamp = ?, score = ?, total_issues = ?, critical = ?,
+                    warnings = ?, status = 'completed'
+                WHERE id = ?
+                """,
+                (timestamp, score, total_issues, critical, warnings, review_id),
+            )
+
+    def release_review(self, review_id: int) -> None:
+        """Drop a claimed review that did not complete, so it can be retried."""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM reviews WHERE id = ?", (review_id,))
 
     def get_recent_reviews(self, limit: int = 50) -> list[dict]:
         """Get the most recent reviews."""
-        with self._connect() as conn:
-            rows = conn.execute(
-                "SELECT * FROM reviews ORDER BY id DESC LIMIT ?", (limit,)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM reviews WHERE status = 'completed' ORDER BY id DESC LIMIT ?",
+                (limit,),
             ).fetchall()
             return [dict(row) for row in rows]
 
@@ -86,21 +256,43 @@ class ReviewDatabase:
         """Check if a specific commit on a PR has already been reviewed."""
         if not commit_sha:
             return False
-        with self._connect() as conn:
-            row = conn.execute(
-                "SELECT 1 FROM reviews WHERE repo = ? AND pr_number = ? AND commit_sha = ? LIMIT 1",
-                (repo, pr_number, commit_sha),
+        with self._lock:
+            row = self._conn.execute(
+                HAS_REVIEWED_COMMIT_SQL, (repo, pr_number, commit_sha)
             ).fetchone()
             return row is not None
 
+    def get_etag(self, url: str) -> tuple[str, bytes] | None:
+        """Get the cached ETag and response body for a URL, if any.
+
+        url is the caller's cache key; GitHubClient adds the Accept type to it.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, body FROM etags WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return row["etag"], zlib.decompress(row["body"])
+
+    def set_etag(self, url: str, etag: str, body: bytes) -> None:
+        """Cache a response body under its ETag. Bodies are stored compressed."""
+        compressed = zlib.compress(body)
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO etags (url, etag, body) VALUES (?, ?, ?)",
+                (url, etag, compressed),
+            )
+
     def get_stats(self) -> dict:
         """Get aggregate statistics."""
-        with self._connect() as conn:
-            row = conn.execute("""
+        with self._lock:
+            row = self._conn.execute("""
                 SELECT
                     COUNT(*) as total_reviews,
                     COALESCE(SUM(total_issues), 0) as total_issues,
                     COALESCE(ROUND(AVG(score), 1), 0) as avg_score
                 FROM reviews
+                WHERE status = 'completed'
             """).fetchone()
             return dict(row)
@@ -1,9 +1,11 @@
 """Parse unified diffs into structured chunks for review."""
 
+import os
 import re
 import logging
-from pathlib import Path
-from src.models import DiffChunk
+from functools import lru_cache
+from collections.abc import AsyncIterable, Collection, Iterator
+from src.models import DiffChunkData
 
 logger = logging.getLogger(__name__)
 
@@ -23,120 +25,197 @@ EXTENSION_MAP = {
     ".cs": "csharp",
 }
 
+# First characters of added, removed and context lines inside a hunk
+_HUNK_BODY_PREFIXES = frozenset("+- ")
+
 HUNK_HEADER_RE = re.compile(
     r"^@@ -(\d+)(?:,\d+)? \+(\d+)(?:,\d+)? @@"
 )
 
 
+# Called for every file header and again for every hunk of that file
+@lru_cache(maxsize=1024)
 def detect_language(file_path: str) -> str:
     """Detect programming language from file extension."""
-    ext = Path(file_path).suffix.lower()
+    ext = os.path.splitext(file_path)[1].lower()
     return EXTENSION_MAP.get(ext, "unknown")
 
 
-def parse_diff(raw_diff: str, supported_languages: list[str] | None = None) -> list[DiffChunk]:
-    """
-    Parse a unified diff string into a list of DiffChunk objects.
-
-    Args:
-        raw_diff: The raw unified diff text from GitHub API
-        supported_languages: Only include files with these languages (None = all)
-
-    Returns:
-        List of DiffChunk objects ready for review
-    """
-    chunks: list[DiffChunk] = []
-    current_file = None
-    current_hunks: list[str] = []
-    hunk_old_start = 0
-    hunk_new_start = 0
+class _DiffChunker:
+    """Incremental unified-diff parser: feed it lines, collect DiffChunkData."""
 
-    in_hunk = False  # Track whether we're inside a hunk
+    def __init__(self, supported_languages: Collection[str] | None = None):
+        # Set membership keeps the per-file language check O(1)
+        self.supported_languages = (
+            frozenset(supported_languages) if supported_languages is not None else None
+        )
+        self.chunks: list[DiffChunkData] = []
+        self.current_file: str | None = None
+        self.current_hunks: list[str] = []
+        self.hunk_old_start = 0
+        self.hunk_new_start = 0
+        self.in_hunk = False  # Track whether we're inside a hunk
+        self.skip_file = False  # Current file is filtered out by language
+
+    def feed(self, line: str) -> None:
+        """Consume a single diff line."""
+        # Hunk body lines dominate any diff; route them with a single
+        # comparison. in_hunk is never set for skipped files.
+        head = line[:1]
+        if self.in_hunk and head in _HUNK_BODY_PREFIXES:
+            self.current_hunks.append(line)
 
-    for line in raw_diff.split("\n"):
         # Detect file header
-        if line.startswith("diff --git"):
+        elif head == "d" and line.startswith("diff --git"):
             # Save previous hunk if exists
-            if current_file and current_hunks:
-                chunk = _build_chunk(
-                    current_file, hunk_old_start, hunk_new_start, current_hunks
-                )
-                if chunk and (
-                    supported_languages is None
-                    or chunk.language in supported_languages
-                ):
-                    chunks.append(chunk)
-                current_hunks = []
+            self._flush()
 
             # Extract file path — handle "a/path" and "b/path"
             parts = line.split(" b/")
-            current_file = parts[-1] if len(parts) > 1 else None
-            in_hunk = False
+            self.current_file = parts[-1] if len(parts) > 1 else None
+            self.in_hunk = False
+            # Classify the file once here so filtered files' hunks are never collected
+            self.skip_file = self.current_file is None or (
+                self.supported_languages is not None
+                and detect_language(self.current_file) not in self.supported_languages
+            )
 
-        # Skip file-level headers (index, ---, +++ lines before hunks)
-        elif line.startswith("index ") or line.startswith("--- ") or line.startswith("+++ "):
-            continue
+        elif self.skip_file:
+            return
 
         # Detect hunk header
-        elif line.startswith("@@"):
+        elif head == "@" and line.startswith("@@"):
             # Save previous hunk
-            if current_file and current_hunks:
-                chunk = _build_chunk(
-                    current_file, hunk_old_start, hunk_new_start, current_hunks
-                )
-                if chunk and (
-                    supported_languages is None
-                    or chunk.language in supported_languages
-                ):
-                    chunks.append(chunk)
-                current_hunks = []
+            self._flush()
 
             match = HUNK_HEADER_RE.match(line)
             if match:
-                hunk_old_start = int(match.group(1))
-                hunk_new_start = int(match.group(2))
-            current_hunks.append(line)
-            in_hunk = True
-
-        elif current_file and in_hunk:
-            current_hunks.append(line)
-
-    # Don't forget the last hunk
-    if current_file and current_hunks:
-        chunk = _build_chunk(
-            current_file, hunk_old_start, hunk_new_start, current_hunks
-        )
-        if chunk and (
-            supported_languages is None or chunk.language in supported_languages
-        ):
-            chunks.append(chunk)
+                self.hunk_old_start = int(match.group(1))
+                self.hunk_new_start = int(match.group(2))
+            self.current_hunks.append(line)
+            self.in_hunk = True
+
+        # Skip file-level headers (index, ---, +++ lines before hunks)
+        elif line.startswith(("index ", "--- ", "+++ ")):
+            return
+
+        elif self.in_hunk:
+            self.current_hunks.append(line)
+
+    def finish(self) -> list[DiffChunkData]:
+        """Flush the last hunk and return all parsed chunks."""
+        # Don't forget the last hunk
+        self._flush()
+        return self.chunks
+
+    def _flush(self) -> None:
+        if self.current_file and self.current_hunks:
+            chunk = _build_chunk(
+                self.current_file, self.hunk_old_start, self.hunk_new_start, self.current_hunks
+            )
+            if chunk:
+                self.chunks.append(chunk)
+        self.current_hunks = []
+
+
+def parse_diff(
+    raw_diff: str,
+    supported_languages: Collection[str] | None = None,
+    max_chunks: int | None = None,
+) -> list[DiffChunkData]:
+    """
+    Parse a unified diff string into a list of DiffChunkData objects.
+
+    Args:
+        raw_diff: The raw unified diff text from GitHub API
+        supported_languages: Only include files with these languages (None = all)
+        max_chunks: Stop parsing once this many chunks are found (None = no limit)
+
+    Returns:
+        List of DiffChunkData objects ready for review
+    """
+    if not raw_diff:
+        return []
+
+    chunker = _DiffChunker(supported_languages)
+    for line in _iter_lines(raw_diff):
+        chunker.feed(line)
+        if max_chunks is not None and len(chunker.chunks) >= max_chunks:
+            break
+    chunks = chunker.finish()[:max_chunks]
 
     logger.info(f"Parsed {len(chunks)} diff chunks from diff")
     return chunks
 
 
+async def parse_diff_stream(
+    lines: AsyncIterable[str],
+    supported_languages: Collection[str] | None = None,
+    max_chunks: int | None = None,
+) -> list[DiffChunkData]:
+    """
+    Parse a unified diff as its lines arrive.
+
+    Args:
+        lines: Async iterable of diff lines (without line endings)
+        supported_languages: Only include files with these languages (None = all)
+        max_chunks: Stop reading once this many chunks are parsed (None = no limit)
+
+    Returns:
+        List of at most max_chunks DiffChunkData objects
+    """
+    chunker = _DiffChunker(supported_languages)
+    async for line in lines:
+        chunker.feed(line)
+        if max_chunks is not None and len(chunker.chunks) >= max_chunks:
+            break
+    chunks = chunker.finish()[:max_chunks]
+
+    logger.info(f"Parsed {len(chunks)} diff chunks from streamed diff")
+    return chunks
+
+
+def _iter_lines(text: str) -> Iterator[str]:
+    """Yield the same lines as text.split("\\n") without building the list."""
+    start = 0
+    find = text.find
+    while (end := find("\n", start)) != -1:
+        yield text[start:end]
+        start = end + 1
+    yield text[start:]
+
+
 def _build_chunk(
     file_path: str,
     old_start: int,
     new_start: int,
     lines: list[str],
-) -> DiffChunk | None:
-    """Build a DiffChunk from raw lines."""
+) -> DiffChunkData | None:
+    """Build a DiffChunkData from raw lines."""
     if not file_path:
         return None
 
     content = "\n".join(lines)
-    added = [ln[1:] for ln in lines if ln.startswith("+") and not ln.startswith("+++")]
-    removed = [ln[1:] for ln in lines if ln.startswith("-") and not ln.startswith("---")]
-    context = [ln[1:] for ln in lines if ln.startswith(" ")]
-
-    return DiffChunk(
+    # File headers (---/+++) never reach here, so every +/- line is content
+    added: list[str] = []
+    removed: list[str] = []
+    context: list[str] = []
+    for ln in lines:
+        head = ln[:1]
+        if head == "+":
+            added.append(ln[1:])
+        elif head == "-":
+            removed.append(ln[1:])
+        elif head == " ":
+            context.append(ln[1:])
+
+    return DiffChunkData(
         file_path=file_path,
         language=detect_language(file_path),
         old_start=old_start,
         new_start=new_start,
         content=content,
-        added_lines=added,
-        removed_lines=removed,
-        context_lines=context,
+        added_lines=tuple(added),
+        removed_lines=tuple(removed),
+        context_lines=tuple(context),
     )
@@ -1,19 +1,42 @@
 """GitHub API client for PR interactions."""
 
+import asyncio
 import httpx
 import logging
+import orjson
+from collections.abc import AsyncIterator
 from typing import Optional
 from src.config import get_settings
+from src.db import ReviewDatabase
 
 logger = logging.getLogger(__name__)
 
 
+async def _aiter_diff_lines(response: httpx.Response) -> AsyncIterator[str]:
+    """Yield the response body split exactly like body.split("\\n").
+
+    httpx's aiter_lines() also breaks on \\r, \\x0c, \\u2028 and the other
+    str.splitlines() separators, which can appear inside a diff line.
+    """
+    pending = ""
+    async for text in response.aiter_text():
+        lines = (pending + text).split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line
+    yield pending
+
+
 class GitHubClient:
     """Handles all GitHub API interactions."""
 
     BASE_URL = "https://api.github.com"
 
-    def __init__(self, token: Optional[str] = None):
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        etag_cache: Optional[ReviewDatabase] = None,
+    ):
         settings = get_settings()
         self.token = token or settings.github_token
         if not self.token:
@@ -23,29 +46,84 @@ class GitHubClient:
             "Accept": "application/vnd.github.v3+json",
             "X-GitHub-Api-Version": "2022-11-28",
         }
+        self._diff_headers = {**self.headers, "Accept": "application/vnd.github.v3.diff"}
+        # Optional store for conditional requests: a 304 reply is free of
+        # rate-limit cost and carries no body.
+        self.etag_cache = etag_cache
+        # A single HTTP/2 connection multiplexes the diff fetch and review
+        # posts; retries only cover connection failures, not HTTP errors.
         self.client = httpx.AsyncClient(
             base_url=self.BASE_URL,
             headers=self.headers,
             timeout=30.0,
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=20,
+                    max_keepalive_connections=20,
+                    keepalive_expiry=60.0,
+                ),
+                retries=2,
+            ),
         )
 
+    def _etag_key(self, url: str, headers: Optional[dict] = None) -> str:
+        """ETag cache key: the same URL serves a different body per Accept type."""
+        accept = (headers or {}).get("Accept", self.headers["Accept"])
+        return f"{url} {accept}"
+
+    async def _cached_get(self, url: str, headers: Optional[dict] = None) -> bytes:
+        """GET a URL, revalidating against the ETag cache when one is set."""
+        if self.etag_cache is None:
+            response = await self.client.get(url, headers=headers)
+            response.raise_for_status()
+            return response.content
+
+        key = self._etag_key(url, headers)
+        cached = await asyncio.to_thread(self.etag_cache.get_etag, key)
+        if cached:
+            headers = {**(headers or {}), "If-None-Match": cached[0]}
+        response = await self.client.get(url, headers=headers)
+        if response.status_code == 304 and cached:
+            logger.debug(f"Not modified, using cached response for {key}")
+            return cached[1]
+        response.raise_for_status()
+        etag = response.headers.get("ETag")
+        if etag:
+            await asyncio.to_thread(self.etag_cache.set_etag, key, etag, response.content)
+        return response.content
+
     async def get_pr_diff(self, owner: str, repo: str, pr_number: int) -> str:
         """Fetch the raw diff of a pull request."""
-        headers = {**self.headers, "Accept": "application/vnd.github.v3.diff"}
-        response = await self.client.get(
+        body = await self._cached_get(
             f"/repos/{owner}/{repo}/pulls/{pr_number}",
-            headers=headers,
+            headers=self._diff_headers,
         )
-        response.raise_for_status()
-        return response.text
+        return body.decode("utf-8", errors="replace")
+
+    async def stream_pr_diff(
+        self, owner: str, repo: str, pr_number: int
+    ) -> AsyncIterator[str]:
+        """Stream the raw diff of a pull request line by line.
+
+        Lines are split on "\\n" only, matching parse_diff on the full text.
+        Closing the iterator early stops the download. Streamed diffs bypass
+        the ETag cache: storing one would mean holding the whole body, and
+        each head SHA is only reviewed once, so a 304 would rarely happen.
+        """
+        async with self.client.stream(
+            "GET",
+            f"/repos/{owner}/{repo}/pulls/{pr_number}",
+            headers=self._diff_headers,
+        ) as response:
+            response.raise_for_status()
+            async for line in _aiter_diff_lines(response):
+                yield line
 
     async def get_pr_files(self, owner: str, repo: str, pr_number: int) -> list[dict]:
         """Get list of files changed in a PR."""
-        response = await self.client.get(
-            f"/repos/{owner}/{repo}/pulls/{pr_number}/files"
-        )
-        response.raise_for_status()
-        return response.json()
+        body = await self._cached_get(f"/repos/{owner}/{repo}/pulls/{pr_number}/files")
+        return orjson.loads(body)
 
     async def get_file_content(
         self, owner: str, repo: str, path: str, ref: str
@@ -1,14 +1,17 @@
 """LLM-powered code review engine using Groq."""
 
-import json
+import asyncio
 import logging
-import time
-from groq import Groq
+import orjson
+from groq import AsyncGroq
 from src.config import get_settings
-from src.models import DiffChunk, ReviewIssue, FileReview, PRReview, Severity
+from src.models import DiffChunk, DiffChunkData, ReviewIssue, FileReview, PRReview, Severity
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on concurrent Groq requests while reviewing a single PR
+MAX_CONCURRENT_REVIEWS = 8
+
 REVIEW_SYSTEM_PROMPT = """You are an expert senior software engineer performing a code review.
 Analyze the provided code diff and identify issues in these categories:
 - **bug**: Logic errors, null pointer risks, off-by-one errors, race conditions
@@ -48,10 +51,12 @@ class LLMReviewer:
 
     def __init__(self):
         settings = get_settings()
-        self.client = Groq(api_key=settings.groq_api_key)
+        self.client = AsyncGroq(api_key=settings.groq_api_key)
         self.model = settings.llm_model
 
-    def review_chunk(self, chunk: DiffChunk, max_retries: int = 3) -> FileReview:
+    async def review_chunk(
+        self, chunk: DiffChunk | DiffChunkData, max_retries: int = 3
+    ) -> FileReview:
         """Review a single diff chunk and return structured feedback.
 
         Retries up to max_retries times with exponential backoff on failure.
@@ -65,7 +70,7 @@ class LLMReviewer:
         last_error = None
         for attempt in range(1, max_retries + 1):
             try:
-                response = self.client.chat.completions.create(
+                response = await self.client.chat.completions.create(
                     model=self.model,
                     messages=[
                         {"role": "system", "content": REVIEW_SYSTEM_PROMPT},
@@ -77,7 +82,7 @@ class LLMReviewer:
                 )
 
                 raw_content = response.choices[0].message.content
-                result = json.loads(raw_content)
+                result = orjson.loads(raw_content)
 
                 issues = [
                     ReviewIssue(
@@ -101,7 +106,7 @@ class LLMReviewer:
                     summary=result.get("summary", ""),
                 )
 
-            except json.JSONDecodeError as e:
+            except orjson.JSONDecodeError as e:
                 last_error = e
                 logger.warning(
                     f"Malformed JSON from LLM for {chunk.file_path} "
@@ -117,7 +122,7 @@ class LLMReviewer:
             if attempt < max_retries:
                 backoff = 2 ** (attempt - 1)  # 1s, 2s
                 logger.info(f"Retrying in {backoff}s...")
-                time.sleep(backoff)
+                await asyncio.sleep(backoff)
 
         # All retries exhausted
         logger.error(f"LLM review failed after {max_retries} attempts for {chunk.file_path}: {last_error}")
@@ -128,32 +133,24 @@ class LLMReviewer:
             summary=f"Review failed after {max_retries} attempts: {last_error}",
         )
 
-    def review_pr(self, chunks: list[DiffChunk]) -> PRReview:
-        """Review all chunks in a PR."""
-        file_reviews = []
-        for chunk in chunks:
-            review = self.review_chunk(chunk)
-            file_reviews.append(review)
-
-        # Aggregate stats
-        all_issues = [i for fr in file_reviews for i in fr.issues]
-        critical = sum(1 for i in all_issues if i.severity == Severity.CRITICAL)
-        warnings = sum(1 for i in all_issues if i.severity == Severity.WARNING)
-
-        # Calculate overall score (start at 10, deduct per issue)
-        score = max(0.0, 10.0 - (critical * 2.0) - (warnings * 0.5) - (len(all_issues) * 0.1))
-
-        return PRReview(
-            pr_number=0,
-            repo_full_name="",
-            file_reviews=file_reviews,
-            overall_score=round(score, 1),
-            summary=self._generate_summary(file_reviews, score),
-            total_issues=len(all_issues),
-            critical_count=critical,
-            warning_count=warnings,
+    async def review_pr(self, chunks: list[DiffChunk] | list[DiffChunkData]) -> PRReview:
+        """Review all chunks in a PR, up to MAX_CONCURRENT_REVIEWS at a time."""
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REVIEWS)
+
+        async def review_with_limit(chunk: DiffChunk | DiffChunkData) -> FileReview:
+            async with semaphore:
+                return await self.review_chunk(chunk)
+
+        # review_chunk turns failures into an empty FileReview, so gather
+        # never sees an exception from a single chunk.
+        file_reviews = await asyncio.gather(
+            *(review_with_limit(chunk) for chunk in chunks)
         )
 
+        review = PRReview.from_file_reviews(file_reviews)
+        review.summary = self._generate_summary(file_reviews, review.overall_score)
+        return review
+
     def _generate_summary(self, reviews: list[FileReview], score: float) -> str:
         """Generate an overall PR summary."""
         total = sum(len(r.issues) for r in reviews)
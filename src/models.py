@@ -1,5 +1,6 @@
 """Pydantic models for the application."""
 
+from dataclasses import dataclass
 from pydantic import BaseModel, Field
 from typing import Optional
 from enum import Enum
@@ -44,6 +45,38 @@ class PRReview(BaseModel):
     critical_count: int = 0
     warning_count: int = 0
 
+    @classmethod
+    def from_file_reviews(
+        cls,
+        file_reviews: list[FileReview],
+        pr_number: int = 0,
+        repo_full_name: str = "",
+        summary: str = "",
+    ) -> "PRReview":
+        """Build a PR review, counting issues and scoring in a single pass."""
+        total = critical = warnings = 0
+        for fr in file_reviews:
+            for issue in fr.issues:
+                total += 1
+                if issue.severity is Severity.CRITICAL:
+                    critical += 1
+                elif issue.severity is Severity.WARNING:
+                    warnings += 1
+
+        # Start at 10 and deduct per issue
+        score = max(0.0, 10.0 - (critical * 2.0) - (warnings * 0.5) - (total * 0.1))
+
+        return cls(
+            pr_number=pr_number,
+            repo_full_name=repo_full_name,
+            file_reviews=file_reviews,
+            overall_score=round(score, 1),
+            summary=summary,
+            total_issues=total,
+            critical_count=critical,
+            warning_count=warnings,
+        )
+
 
 class DiffChunk(BaseModel):
     """A parsed chunk from a PR diff."""
@@ -57,6 +90,35 @@ class DiffChunk(BaseModel):
     context_lines: list[str] = []
 
 
+@dataclass(slots=True, frozen=True)
+class DiffChunkData:
+    """Lightweight, unvalidated DiffChunk produced by the diff parser.
+
+    Same fields as DiffChunk, with tuples for the line lists.
+    """
+    file_path: str
+    language: str
+    old_start: int
+    new_start: int
+    content: str
+    added_lines: tuple[str, ...] = ()
+    removed_lines: tuple[str, ...] = ()
+    context_lines: tuple[str, ...] = ()
+
+    def to_model(self) -> DiffChunk:
+        """Convert to the pydantic DiffChunk, e.g. for JSON serialization."""
+        return DiffChunk(
+            file_path=self.file_path,
+            language=self.language,
+            old_start=self.old_start,
+            new_start=self.new_start,
+            content=self.content,
+            added_lines=list(self.added_lines),
+            removed_lines=list(self.removed_lines),
+            context_lines=list(self.context_lines),
+        )
+
+
 class WebhookPayload(BaseModel):
     """Simplified GitHub webhook payload."""
     action: str
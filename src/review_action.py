@@ -1,10 +1,11 @@
 """Entry point for GitHub Action mode — reads PR context from env."""
 
 import os
-import json
 import logging
+import orjson
+from contextlib import aclosing
 from src.github_client import GitHubClient
-from src.diff_parser import parse_diff
+from src.diff_parser import parse_diff_stream
 from src.llm_reviewer import LLMReviewer
 from src.comment_formatter import format_summary_comment, format_inline_comments
 import asyncio
@@ -22,8 +23,8 @@ async def main():
         logger.error("No GitHub event payload found")
         return
 
-    with open(event_path) as f:
-        event = json.load(f)
+    with open(event_path, "rb") as f:
+        event = orjson.loads(f.read())
 
     pr = event.get("pull_request", {})
     repo = event.get("repository", {})
@@ -41,18 +42,18 @@ async def main():
     client = GitHubClient(token=github_token)
 
     try:
-        raw_diff = await client.get_pr_diff(owner, repo_name, pr_number)
-        chunks = parse_diff(raw_diff)
-
         max_files = int(os.environ.get("MAX_FILES_PER_REVIEW", 20))
-        chunks = chunks[:max_files]
+        async with aclosing(
+            client.stream_pr_diff(owner, repo_name, pr_number)
+        ) as diff_lines:
+            chunks = await parse_diff_stream(diff_lines, max_chunks=max_files)
 
         if not chunks:
             logger.info("No reviewable changes found")
             return
 
         reviewer = LLMReviewer()
-        review = reviewer.review_pr(chunks)
+        review = await reviewer.review_pr(chunks)
         review.pr_number = pr_number
         review.repo_full_name = full_name
 
@@ -1,8 +1,38 @@
 """Pytest configuration and shared fixtures."""
 
 import pytest
+from pathlib import Path
+from src.db import ReviewDatabase
 from src.models import DiffChunk, ReviewIssue, FileReview, PRReview, Severity
 
+# Keep temporary tables and a larger page cache in memory
+TEST_DB_PRAGMAS = {"temp_store": "MEMORY", "cache_size": -64000}
+
+
+@pytest.fixture(scope="module")
+def shared_db():
+    """In-memory ReviewDatabase whose connection and schema last for a test module."""
+    database = ReviewDatabase(db_path=Path(":memory:"), pragmas=TEST_DB_PRAGMAS)
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def db(shared_db):
+    """Empty ReviewDatabase; rows are cleared instead of rebuilding the schema."""
+    with shared_db._transaction() as conn:
+        conn.execute("DELETE FROM reviews")
+        conn.execute("DELETE FROM etags")
+    return shared_db
+
+
+@pytest.fixture
+def file_db(tmp_path):
+    """On-disk ReviewDatabase in pytest's auto-cleaned tmp_path."""
+    database = ReviewDatabase(db_path=tmp_path / "test_reviews.db", pragmas=TEST_DB_PRAGMAS)
+    yield database
+    database.close()
+
 
 @pytest.fixture
 def sample_python_diff():
@@ -0,0 +1,159 @@
+"""Tests for the webhook server's review flow."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import src.app as app_module
+from src.config import Settings
+from src.models import FileReview, PRReview, ReviewIssue, Severity
+
+_PYTHON_DIFF = """diff --git a/app.py b/app.py
+--- a/app.py
++++ b/app.py
+@@ -1,1 +1,1 @@
+-old
++new
+"""
+
+_UNSUPPORTED_DIFF = """diff --git a/notes.txt b/notes.txt
+--- a/notes.txt
++++ b/notes.txt
+@@ -1,1 +1,1 @@
+-old
++new
+"""
+
+_HEADERS = {"X-GitHub-Event": "pull_request"}
+
+
+def _payload(sha="abc123"):
+    return {
+        "action": "opened",
+        "pull_request": {"number": 7, "head": {"sha": sha}},
+        "repository": {"full_name": "owner/repo"},
+    }
+
+
+class FakeGitHubClient:
+    """Serves a fixed diff and records what gets posted."""
+
+    def __init__(self, diff=_PYTHON_DIFF):
+        self.diff = diff
+        self.posted = []
+        self.fail_posts = False
+
+    async def stream_pr_diff(self, owner, repo, pr_number):
+        for line in self.diff.split("\n"):
+            yield line
+
+    async def create_review(self, owner, repo, pr_number, body, comments, event):
+        if self.fail_posts:
+            raise RuntimeError("GitHub is down")
+        self.posted.append(("review", pr_number))
+
+    async def post_comment(self, owner, repo, pr_number, body):
+        if self.fail_posts:
+            raise RuntimeError("GitHub is down")
+        self.posted.append(("comment", pr_number))
+
+
+class FakeReviewer:
+    """Returns one warning per reviewed chunk without calling an LLM."""
+
+    async def review_pr(self, chunks):
+        file_reviews = [
+            FileReview(
+                file_path=chunk.file_path,
+                language=chunk.language,
+                issues=[
+                    ReviewIssue(
+                        file_path=chunk.file_path,
+                        line_start=1,
+                        line_end=1,
+                        severity=Severity.WARNING,
+                        category="bug",
+                        title="Test",
+                        description="Test",
+                    )
+                ],
+            )
+            for chunk in chunks
+        ]
+        return PRReview.from_file_reviews(file_reviews)
+
+
+@pytest.fixture
+def github(monkeypatch, db):
+    """Wire the app to fakes and the test database; returns the fake GitHub client."""
+    fake_github = FakeGitHubClient()
+    monkeypatch.setattr(
+        app_module, "settings", Settings(groq_api_key="test-key", github_webhook_secret=None)
+    )
+    monkeypatch.setattr(app_module, "github_client", fake_github)
+    monkeypatch.setattr(app_module, "review_db", db)
+    monkeypatch.setattr(app_module, "llm_reviewer", FakeReviewer())
+    monkeypatch.setattr(app_module, "_dashboard_cache", None)
+    monkeypatch.setattr(app_module, "_window_start", 0.0)
+    monkeypatch.setattr(app_module, "_window_count", 0)
+    return fake_github
+
+
+@pytest.fixture
+def client(github):
+    return TestClient(app_module.app, raise_server_exceptions=False)
+
+
+def test_webhook_reviews_then_skips_duplicate_delivery(client, github, db):
+    """Test that a redelivered event for the same commit isn't reviewed twice."""
+    response = client.post("/webhook", headers=_HEADERS, json=_payload())
+    assert response.status_code == 200
+    assert response.json()["status"] == "reviewed"
+
+    response = client.post("/webhook", headers=_HEADERS, json=_payload())
+    assert response.json() == {"status": "already_reviewed", "commit": "abc123"}
+    assert github.posted == [("review", 7)]
+    assert db.get_stats()["total_reviews"] == 1
+
+
+def test_webhook_post_failure_releases_claim(client, github, db):
+    """Test that a failed post returns 500 and lets a redelivery claim the commit."""
+    github.fail_posts = True
+    response = client.post("/webhook", headers=_HEADERS, json=_payload())
+    assert response.status_code == 500
+    assert db.has_reviewed_commit("owner/repo", 7, "abc123") is False
+
+    github.fail_posts = False
+    response = client.post("/webhook", headers=_HEADERS, json=_payload())
+    assert response.json()["status"] == "reviewed"
+    assert github.posted == [("review", 7)]
+
+
+def test_webhook_finalize_failure_releases_claim(client, github, db, monkeypatch):
+    """Test that a failed DB write surfaces from the concurrent post/save step."""
+    def fail_finalize(*args, **kwargs):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(db, "finalize_review", fail_finalize)
+    response = client.post("/webhook", headers=_HEADERS, json=_payload())
+    assert response.status_code == 500
+    assert "disk full" in response.json()["detail"]
+    assert db.has_reviewed_commit("owner/repo", 7, "abc123") is False
+
+
+def test_webhook_without_reviewable_files_releases_claim(client, github, db):
+    """Test that a diff with no supported files is skipped and not claimed."""
+    github.diff = _UNSUPPORTED_DIFF
+    response = client.post("/webhook", headers=_HEADERS, json=_payload())
+    assert response.json() == {"status": "skipped", "reason": "No reviewable files"}
+    assert db.has_reviewed_commit("owner/repo", 7, "abc123") is False
+    assert github.posted == []
+
+
+def test_webhook_review_clears_dashboard_cache(client, github):
+    """Test that a finished review shows up on the dashboard right away."""
+    assert "owner/repo" not in client.get("/dashboard").text
+    assert app_module._dashboard_cache is not None
+
+    client.post("/webhook", headers=_HEADERS, json=_payload())
+    assert app_module._dashboard_cache is None
+    assert "owner/repo" in client.get("/dashboard").text
@@ -1,19 +1,12 @@
 """Tests for SQLite review database."""
 
-import tempfile
-from pathlib import Path
-from src.db import ReviewDatabase
+import sqlite3
 
+from src.db import HAS_REVIEWED_COMMIT_SQL, ReviewDatabase
 
-def _make_db():
-    """Create a test database in a temp directory."""
-    tmp = tempfile.mkdtemp()
-    return ReviewDatabase(db_path=Path(tmp) / "test_reviews.db")
 
-
-def test_save_and_retrieve():
+def test_save_and_retrieve(db):
     """Test saving and retrieving reviews."""
-    db = _make_db()
     db.save_review(
         timestamp="2025-01-01T12:00:00",
         repo="owner/repo",
@@ -32,20 +25,21 @@ def test_save_and_retrieve():
     assert reviews[0]["commit_sha"] == "abc123"
 
 
-def test_recent_reviews_ordering():
+def test_recent_reviews_ordering(db):
     """Test that reviews are returned in reverse chronological order."""
-    db = _make_db()
-    for i in range(3):
-        db.save_review(
-            timestamp=f"2025-01-0{i+1}T12:00:00",
-            repo="owner/repo",
-            pr_number=i + 1,
-            pr_url=f"https://github.com/owner/repo/pull/{i+1}",
-            score=5.0 + i,
-            total_issues=i,
-            critical=0,
-            warnings=i,
-        )
+    db.save_reviews_bulk([
+        {
+            "timestamp": f"2025-01-0{i+1}T12:00:00",
+            "repo": "owner/repo",
+            "pr_number": i + 1,
+            "pr_url": f"https://github.com/owner/repo/pull/{i+1}",
+            "score": 5.0 + i,
+            "total_issues": i,
+            "critical": 0,
+            "warnings": i,
+        }
+        for i in range(3)
+    ])
     reviews = db.get_recent_reviews()
     assert len(reviews) == 3
     # Most recent first
@@ -53,9 +47,30 @@ def test_recent_reviews_ordering():
     assert reviews[2]["pr_number"] == 1
 
 
-def test_has_reviewed_commit():
+def test_save_reviews_bulk(db):
+    """Test saving several reviews in one call."""
+    db.save_reviews_bulk([
+        {
+            "timestamp": "2025-01-01T12:00:00",
+            "repo": "owner/repo",
+            "pr_number": i,
+            "pr_url": f"https://github.com/owner/repo/pull/{i}",
+            "score": 7.0,
+            "total_issues": 1,
+            "critical": 0,
+            "warnings": 1,
+            "commit_sha": f"sha{i}",
+        }
+        for i in range(5)
+    ])
+    reviews = db.get_recent_reviews()
+    assert len(reviews) == 5
+    assert reviews[0]["pr_number"] == 4
+    assert db.has_reviewed_commit("owner/repo", 2, "sha2") is True
+
+
+def test_has_reviewed_commit(db):
     """Test commit deduplication check."""
-    db = _make_db()
     db.save_review(
         timestamp="2025-01-01T12:00:00",
         repo="owner/repo",
@@ -75,45 +90,237 @@ def test_has_reviewed_commit():
     assert db.has_reviewed_commit("owner/repo", 1, "") is False
 
 
-def test_get_stats():
+def test_reviews_persist_on_disk(file_db):
+    """Test that a file-backed database uses WAL and keeps reviews across reopening."""
+    assert file_db._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    file_db.save_review(
+        timestamp="2025-01-01T12:00:00",
+        repo="owner/repo",
+        pr_number=1,
+        pr_url="url",
+        score=9.0,
+        total_issues=0,
+        critical=0,
+        warnings=0,
+        commit_sha="abc123",
+    )
+    file_db.close()
+
+    reopened = ReviewDatabase(db_path=file_db.db_path)
+    try:
+        assert reopened.has_reviewed_commit("owner/repo", 1, "abc123") is True
+    finally:
+        reopened.close()
+
+
+def test_has_reviewed_commit_at_scale(db):
+    """Test that commit lookups on a large table are served by an index."""
+    db.save_reviews_bulk([
+        {
+            "timestamp": "2025-01-01T12:00:00",
+            "repo": f"owner/repo{i % 10}",
+            "pr_number": i,
+            "pr_url": "url",
+            "score": 8.0,
+            "total_issues": 0,
+            "critical": 0,
+            "warnings": 0,
+            "commit_sha": f"sha{i:05d}",
+        }
+        for i in range(10_000)
+    ])
+
+    plan = db._conn.execute(
+        "EXPLAIN QUERY PLAN " + HAS_REVIEWED_COMMIT_SQL,
+        ("owner/repo7", 9997, "sha09997"),
+    ).fetchall()
+    assert "USING COVERING INDEX idx_reviews_claim" in plan[0]["detail"]
+
+    assert db.has_reviewed_commit("owner/repo7", 9997, "sha09997") is True
+    assert db.has_reviewed_commit("owner/repo7", 9997, "missing") is False
+
+
+def test_get_stats(db):
     """Test aggregate statistics."""
-    db = _make_db()
     # Empty DB
     stats = db.get_stats()
     assert stats["total_reviews"] == 0
     assert stats["avg_score"] == 0
 
     # Add reviews
-    for score in [8.0, 6.0, 10.0]:
-        db.save_review(
-            timestamp="2025-01-01T12:00:00",
-            repo="owner/repo",
-            pr_number=1,
-            pr_url="url",
-            score=score,
-            total_issues=1,
-            critical=0,
-            warnings=1,
-        )
+    db.save_reviews_bulk([
+        {
+            "timestamp": "2025-01-01T12:00:00",
+            "repo": "owner/repo",
+            "pr_number": 1,
+            "pr_url": "url",
+            "score": score,
+            "total_issues": 1,
+            "critical": 0,
+            "warnings": 1,
+        }
+        for score in [8.0, 6.0, 10.0]
+    ])
     stats = db.get_stats()
     assert stats["total_reviews"] == 3
     assert stats["total_issues"] == 3
     assert stats["avg_score"] == 8.0  # (8 + 6 + 10) / 3
 
 
-def test_limit_recent_reviews():
+def test_limit_recent_reviews(db):
     """Test that limit parameter works."""
-    db = _make_db()
-    for i in range(10):
-        db.save_review(
-            timestamp=f"2025-01-01T{i:02d}:00:00",
-            repo="owner/repo",
-            pr_number=i,
-            pr_url="url",
-            score=5.0,
-            total_issues=0,
-            critical=0,
-            warnings=0,
-        )
+    db.save_reviews_bulk([
+        {
+            "timestamp": f"2025-01-01T{i:02d}:00:00",
+            "repo": "owner/repo",
+            "pr_number": i,
+            "pr_url": "url",
+            "score": 5.0,
+            "total_issues": 0,
+            "critical": 0,
+            "warnings": 0,
+        }
+        for i in range(10)
+    ])
     reviews = db.get_recent_reviews(limit=3)
     assert len(reviews) == 3
+
+
+def test_try_claim_review(db):
+    """Test that a commit can only be claimed once."""
+    review_id = db.try_claim_review(
+        timestamp="2025-01-01T12:00:00",
+        repo="owner/repo",
+        pr_number=1,
+        pr_url="https://github.com/owner/repo/pull/1",
+        commit_sha="abc123",
+    )
+    assert review_id is not None
+    assert db.has_reviewed_commit("owner/repo", 1, "abc123") is True
+
+    duplicate = db.try_claim_review(
+        timestamp="2025-01-01T12:00:01",
+        repo="owner/repo",
+        pr_number=1,
+        pr_url="https://github.com/owner/repo/pull/1",
+        commit_sha="abc123",
+    )
+    assert duplicate is None
+    # In-progress claims are hidden from the dashboard
+    assert db.get_recent_reviews() == []
+    assert db.get_stats()["total_reviews"] == 0
+
+    db.finalize_review(
+        review_id,
+        timestamp="2025-01-01T12:01:00",
+        score=7.5,
+        total_issues=3,
+        critical=0,
+        warnings=2,
+    )
+    reviews = db.get_recent_reviews()
+    assert len(reviews) == 1
+    assert reviews[0]["score"] == 7.5
+    assert reviews[0]["status"] == "completed"
+
+
+def test_try_claim_review_takes_over_stale_claim(db):
+    """Test that a claim abandoned mid-review doesn't block the commit forever."""
+    args = dict(repo="owner/repo", pr_number=1, pr_url="url", commit_sha="abc123")
+    stale_id = db.try_claim_review(timestamp="2025-01-01T12:00:00", **args)
+
+    # Still within the timeout: the claim holds
+    assert db.try_claim_review(timestamp="2025-01-01T12:10:00", **args) is None
+
+    # Past the timeout: a redelivery replaces the abandoned claim
+    new_id = db.try_claim_review(timestamp="2025-01-01T12:20:00", **args)
+    assert new_id is not None and new_id != stale_id
+
+    # Completed reviews are never taken over
+    db.finalize_review(
+        new_id,
+        timestamp="2025-01-01T12:21:00",
+        score=8.0,
+        total_issues=0,
+        critical=0,
+        warnings=0,
+    )
+    assert db.try_claim_review(timestamp="2025-01-02T12:00:00", **args) is None
+    assert len(db.get_recent_reviews()) == 1
+
+
+def test_release_review(db):
+    """Test that a released claim can be claimed again."""
+    args = dict(
+        timestamp="2025-01-01T12:00:00",
+        repo="owner/repo",
+        pr_number=1,
+        pr_url="url",
+        commit_sha="abc123",
+    )
+    review_id = db.try_claim_review(**args)
+    db.release_review(review_id)
+    assert db.has_reviewed_commit("owner/repo", 1, "abc123") is False
+    assert db.try_claim_review(**args) is not None
+
+
+def test_etag_cache(db):
+    """Test that cached ETags and bodies round-trip and can be replaced."""
+    url = "/repos/owner/repo/pulls/1"
+    assert db.get_etag(url) is None
+
+    db.set_etag(url, '"v1"', b"diff --git a/x.py b/x.py\n")
+    assert db.get_etag(url) == ('"v1"', b"diff --git a/x.py b/x.py\n")
+
+    db.set_etag(url, '"v2"', b"updated")
+    assert db.get_etag(url) == ('"v2"', b"updated")
+
+
+def test_custom_pragmas(db):
+    """Test that extra PRAGMAs are applied to the connection."""
+    assert db._conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+    assert db._conn.execute("PRAGMA cache_size").fetchone()[0] == -64000
+
+
+def test_migrates_pre_claim_database_with_duplicates(tmp_path):
+    """Test that opening an old database with duplicate commits keeps the newest row."""
+    db_path = tmp_path / "old_reviews.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE reviews (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            repo TEXT NOT NULL,
+            pr_number INTEGER NOT NULL,
+            pr_url TEXT NOT NULL,
+            score REAL NOT NULL,
+            total_issues INTEGER NOT NULL DEFAULT 0,
+            critical INTEGER NOT NULL DEFAULT 0,
+            warnings INTEGER NOT NULL DEFAULT 0,
+            commit_sha TEXT DEFAULT ''
+        )
+    """)
+    conn.execute("CREATE INDEX idx_reviews_repo_pr ON reviews (repo, pr_number)")
+    conn.execute("CREATE INDEX idx_reviews_commit ON reviews (commit_sha)")
+    conn.executemany(
+        "INSERT INTO reviews (timestamp, repo, pr_number, pr_url, score, commit_sha) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            ("2025-01-01T12:00:00", "owner/repo", 1, "url", 6.0, "abc123"),
+            ("2025-01-01T12:00:01", "owner/repo", 1, "url", 7.0, "abc123"),
+            ("2025-01-01T12:00:02", "owner/repo", 2, "url", 8.0, ""),
+            ("2025-01-01T12:00:03", "owner/repo", 2, "url", 9.0, ""),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+    db = ReviewDatabase(db_path=db_path)
+    try:
+        reviews = db.get_recent_reviews()
+        # Duplicate commit collapsed to its newest row; SHA-less rows untouched
+        assert [r["score"] for r in reviews] == [9.0, 8.0, 7.0]
+        assert all(r["status"] == "completed" for r in reviews)
+        assert db.try_claim_review("2025-01-02T12:00:00", "owner/repo", 1, "url", "abc123") is None
+    finally:
+        db.close()
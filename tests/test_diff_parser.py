@@ -1,15 +1,45 @@
 """Tests for diff_parser module."""
 
-from src.diff_parser import parse_diff, detect_language, _build_chunk
+import asyncio
 
+import pytest
+from src.diff_parser import parse_diff, parse_diff_stream, detect_language, _build_chunk
 
-def test_detect_language():
+# One Python file and one Ruby file
+_MIXED_DIFF = """diff --git a/app.py b/app.py
+--- a/app.py
++++ b/app.py
+@@ -1,1 +1,1 @@
+-old
++new
+diff --git a/test.rb b/test.rb
+--- a/test.rb
++++ b/test.rb
+@@ -1,1 +1,1 @@
+-old
++new
+"""
+
+
+@pytest.fixture(scope="session")
+def mixed_chunks():
+    """_MIXED_DIFF parsed with only Python supported. Read-only."""
+    return parse_diff(_MIXED_DIFF, supported_languages=["python"])
+
+
+@pytest.mark.parametrize(
+    "path,language",
+    [
+        ("app.py", "python"),
+        ("main.js", "javascript"),
+        ("component.tsx", "typescript"),
+        ("Main.java", "java"),
+        ("unknown.xyz", "unknown"),
+    ],
+)
+def test_detect_language(path, language):
     """Test language detection from file extensions."""
-    assert detect_language("app.py") == "python"
-    assert detect_language("main.js") == "javascript"
-    assert detect_language("component.tsx") == "typescript"
-    assert detect_language("Main.java") == "java"
-    assert detect_language("unknown.xyz") == "unknown"
+    assert detect_language(path) == language
 
 
 def test_parse_simple_diff(sample_python_diff):
@@ -30,24 +60,51 @@ def test_parse_empty_diff():
     assert len(chunks) == 0
 
 
-def test_parse_diff_with_language_filter():
+def test_parse_diff_with_language_filter(mixed_chunks):
     """Test filtering diffs by supported languages."""
-    diff = """diff --git a/app.py b/app.py
---- a/app.py
-+++ b/app.py
-@@ -1,1 +1,1 @@
--old
-+new
-diff --git a/test.rb b/test.rb
---- a/test.rb
-+++ b/test.rb
-@@ -1,1 +1,1 @@
--old
-+new
-"""
-    chunks = parse_diff(diff, supported_languages=["python"])
-    assert len(chunks) == 1
-    assert chunks[0].language == "python"
+    assert len(mixed_chunks) == 1
+    assert mixed_chunks[0].language == "python"
+
+
+def test_parse_diff_max_chunks():
+    """Test that parsing stops once max_chunks chunks are found."""
+    diff = "".join(
+        f"diff --git a/f{i}.py b/f{i}.py\n@@ -1,1 +1,1 @@\n-old\n+new\n"
+        for i in range(5)
+    )
+    chunks = parse_diff(diff, max_chunks=2)
+    assert [c.file_path for c in chunks] == ["f0.py", "f1.py"]
+
+
+def test_parse_diff_stream_matches_parse_diff(sample_python_diff):
+    """Test that streamed parsing yields the same chunks as parse_diff."""
+    async def lines():
+        for line in sample_python_diff.split("\n"):
+            yield line
+
+    chunks = asyncio.run(parse_diff_stream(lines()))
+    assert chunks == parse_diff(sample_python_diff)
+
+
+def test_parse_diff_stream_max_chunks():
+    """Test that streamed parsing stops reading at max_chunks."""
+    consumed = []
+
+    async def lines():
+        for i in range(5):
+            for line in (
+                f"diff --git a/f{i}.py b/f{i}.py",
+                "@@ -1,1 +1,1 @@",
+                "-old",
+                "+new",
+            ):
+                consumed.append(line)
+                yield line
+
+    chunks = asyncio.run(parse_diff_stream(lines(), max_chunks=2))
+    assert [c.file_path for c in chunks] == ["f0.py", "f1.py"]
+    # The stream is abandoned right after the third file header
+    assert len(consumed) == 9
 
 
 def test_build_chunk():
@@ -66,3 +123,19 @@ def test_build_chunk():
     assert "added" in chunk.added_lines
     assert "removed" in chunk.removed_lines
     assert "context" in chunk.context_lines
+
+
+def test_parse_diff_keeps_lines_that_look_like_headers():
+    """Test that hunk lines starting with --- or +++ are kept as content."""
+    diff = """diff --git a/schema.py b/schema.py
+--- a/schema.py
++++ b/schema.py
+@@ -1,2 +1,2 @@
+--- old comment
++++ new comment
+ unchanged
+"""
+    chunks = parse_diff(diff)
+    assert len(chunks) == 1
+    assert chunks[0].removed_lines == ("-- old comment",)
+    assert chunks[0].added_lines == ("++ new comment",)
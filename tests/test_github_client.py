@@ -0,0 +1,110 @@
+"""Tests for GitHub API client."""
+
+import asyncio
+from contextlib import aclosing
+
+import httpx
+import orjson
+import pytest
+from src.config import get_settings
+from src.diff_parser import parse_diff, parse_diff_stream
+from src.github_client import GitHubClient
+
+# Hunk lines holding characters that str.splitlines() treats as line breaks
+_DIFF_WITH_SEPARATORS = (
+    "diff --git a/app.py b/app.py\n"
+    "--- a/app.py\n"
+    "+++ b/app.py\n"
+    "@@ -1,3 +1,4 @@\n"
+    " import os\r\n"
+    "-# old section\n"
+    "+# section\x0c\n"
+    "+s = '\u2028'\n"
+    "+t = 'a\x1eb\x85c'\n"
+)
+
+
+@pytest.fixture
+def make_client(monkeypatch):
+    """Build a GitHubClient whose requests are answered by a handler."""
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    get_settings.cache_clear()
+
+    def make(handler, etag_cache=None):
+        client = GitHubClient(token="test-token", etag_cache=etag_cache)
+        client.client = httpx.AsyncClient(
+            base_url=client.BASE_URL, transport=httpx.MockTransport(handler)
+        )
+        return client
+
+    yield make
+    get_settings.cache_clear()
+
+
+def _chunked_response(body: str, size: int = 7) -> httpx.Response:
+    """Serve body in small pieces so lines straddle network chunks."""
+    data = body.encode("utf-8")
+
+    async def chunks():
+        for start in range(0, len(data), size):
+            yield data[start:start + size]
+
+    return httpx.Response(200, content=chunks())
+
+
+async def _collect_stream(client: GitHubClient) -> list[str]:
+    async with aclosing(client.stream_pr_diff("owner", "repo", 1)) as lines:
+        return [line async for line in lines]
+
+
+def test_stream_pr_diff_splits_on_newlines_only(make_client):
+    """Test that streamed lines match parse_diff on the full body."""
+    client = make_client(lambda request: _chunked_response(_DIFF_WITH_SEPARATORS))
+
+    lines = asyncio.run(_collect_stream(client))
+    assert lines == _DIFF_WITH_SEPARATORS.split("\n")
+
+    async def lines_iter():
+        for line in lines:
+            yield line
+
+    chunks = asyncio.run(parse_diff_stream(lines_iter()))
+    assert chunks == parse_diff(_DIFF_WITH_SEPARATORS)
+    assert chunks[0].added_lines == ("# section\x0c", "s = '\u2028'", "t = 'a\x1eb\x85c'")
+
+
+def test_stream_pr_diff_bypasses_etag_cache(make_client, db):
+    """Test that streamed diffs are neither revalidated nor stored in the ETag cache."""
+    conditional = []
+
+    def handler(request):
+        conditional.append(request.headers.get("If-None-Match"))
+        response = _chunked_response(_DIFF_WITH_SEPARATORS)
+        response.headers["ETag"] = '"v1"'
+        return response
+
+    client = make_client(handler, etag_cache=db)
+    asyncio.run(_collect_stream(client))
+    asyncio.run(_collect_stream(client))
+    assert conditional == [None, None]
+    assert db._conn.execute("SELECT COUNT(*) FROM etags").fetchone()[0] == 0
+
+
+def test_etag_cache_is_keyed_by_accept_type(make_client, db):
+    """Test that a cached diff is never served for a JSON request to the same URL."""
+    url = "/repos/owner/repo/pulls/1"
+
+    def handler(request):
+        # Same ETag for both representations, as a server ignoring Vary might send
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        if request.headers["Accept"] == "application/vnd.github.v3.diff":
+            return httpx.Response(200, text=_DIFF_WITH_SEPARATORS, headers={"ETag": '"v1"'})
+        return httpx.Response(200, json={"number": 1}, headers={"ETag": '"v1"'})
+
+    client = make_client(handler, etag_cache=db)
+    assert asyncio.run(client.get_pr_diff("owner", "repo", 1)) == _DIFF_WITH_SEPARATORS
+    assert orjson.loads(asyncio.run(client._cached_get(url))) == {"number": 1}
+    # Both representations are now cached separately and revalidate to themselves
+    assert asyncio.run(client.get_pr_diff("owner", "repo", 1)) == _DIFF_WITH_SEPARATORS
+    assert orjson.loads(asyncio.run(client._cached_get(url))) == {"number": 1}
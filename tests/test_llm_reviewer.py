@@ -0,0 +1,108 @@
+"""Tests for the LLM review engine."""
+
+import asyncio
+from types import SimpleNamespace
+
+import orjson
+import pytest
+
+import src.llm_reviewer as llm_reviewer_module
+from src.config import get_settings
+from src.llm_reviewer import MAX_CONCURRENT_REVIEWS, LLMReviewer
+from src.models import DiffChunkData
+
+# Captured before the backoffs fixture patches asyncio.sleep
+_real_sleep = asyncio.sleep
+
+
+class FakeCompletions:
+    """Stand-in for ``AsyncGroq.chat.completions`` that tracks concurrency."""
+
+    def __init__(self, failing_path=None):
+        self.failing_path = failing_path
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, messages, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            # Yield so the other reviews get a chance to start
+            await _real_sleep(0)
+            file_path = messages[1]["content"].split("`")[1]
+            if file_path == self.failing_path:
+                raise RuntimeError("rate limited")
+            content = orjson.dumps({"issues": [], "summary": file_path}).decode()
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content=content))]
+            )
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture
+def backoffs(monkeypatch):
+    """Skip retry backoff; returns the delays that would have been slept."""
+    delays = []
+
+    async def no_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(llm_reviewer_module.asyncio, "sleep", no_sleep)
+    return delays
+
+
+@pytest.fixture
+def make_reviewer(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    get_settings.cache_clear()
+
+    def _make(failing_path=None):
+        reviewer = LLMReviewer()
+        completions = FakeCompletions(failing_path)
+        reviewer.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        return reviewer, completions
+
+    yield _make
+    get_settings.cache_clear()
+
+
+def _chunks(count):
+    return [
+        DiffChunkData(
+            file_path=f"src/module_{i}.py",
+            language="python",
+            old_start=1,
+            new_start=1,
+            content="+x = 1",
+        )
+        for i in range(count)
+    ]
+
+
+def test_review_pr_keeps_chunk_order_and_bounds_concurrency(make_reviewer, backoffs):
+    """Test that reviews run concurrently but come back in chunk order."""
+    reviewer, completions = make_reviewer()
+    chunks = _chunks(MAX_CONCURRENT_REVIEWS * 3)
+    review = asyncio.run(reviewer.review_pr(chunks))
+
+    assert [r.file_path for r in review.file_reviews] == [c.file_path for c in chunks]
+    assert [r.summary for r in review.file_reviews] == [c.file_path for c in chunks]
+    assert 1 < completions.max_in_flight <= MAX_CONCURRENT_REVIEWS
+    assert backoffs == []
+
+
+def test_review_pr_turns_failing_chunk_into_empty_review(make_reviewer, backoffs):
+    """Test that a chunk failing every retry doesn't sink the rest of the PR."""
+    chunks = _chunks(3)
+    reviewer, _ = make_reviewer(failing_path=chunks[1].file_path)
+    review = asyncio.run(reviewer.review_pr(chunks))
+
+    failed = review.file_reviews[1]
+    assert failed.issues == []
+    assert failed.summary.startswith("Review failed after 3 attempts")
+    assert [r.summary for r in review.file_reviews[::2]] == [
+        chunks[0].file_path,
+        chunks[2].file_path,
+    ]
+    assert backoffs == [1, 2]
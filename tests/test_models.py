@@ -1,5 +1,7 @@
 """Tests for models module."""
 
+import dataclasses
+
 import pytest
 from pydantic import ValidationError
 from src.models import (
@@ -8,6 +10,18 @@ from src.models import (
     FileReview,
     PRReview,
     DiffChunk,
+    DiffChunkData,
+)
+
+# Valid ReviewIssue fields; tests override only what they check
+_ISSUE_DEFAULTS = dict(
+    file_path="test.py",
+    line_start=1,
+    line_end=1,
+    severity=Severity.INFO,
+    category="style",
+    title="Test",
+    description="Test",
 )
 
 
@@ -21,15 +35,7 @@ def test_severity_enum():
 
 def test_review_issue_creation():
     """Test creating a ReviewIssue."""
-    issue = ReviewIssue(
-        file_path="test.py",
-        line_start=10,
-        line_end=12,
-        severity=Severity.WARNING,
-        category="bug",
-        title="Test issue",
-        description="Test description",
-    )
+    issue = ReviewIssue(**{**_ISSUE_DEFAULTS, "severity": Severity.WARNING})
     assert issue.file_path == "test.py"
     assert issue.severity == Severity.WARNING
     assert issue.confidence == 0.8  # default value
@@ -38,30 +44,12 @@ def test_review_issue_creation():
 def test_review_issue_confidence_validation():
     """Test confidence score validation."""
     # Valid confidence
-    issue = ReviewIssue(
-        file_path="test.py",
-        line_start=1,
-        line_end=1,
-        severity=Severity.INFO,
-        category="style",
-        title="Test",
-        description="Test",
-        confidence=0.9,
-    )
+    issue = ReviewIssue(**_ISSUE_DEFAULTS, confidence=0.9)
     assert issue.confidence == 0.9
     
     # Invalid confidence should raise ValidationError
     with pytest.raises(ValidationError):
-        ReviewIssue(
-            file_path="test.py",
-            line_start=1,
-            line_end=1,
-            severity=Severity.INFO,
-            category="style",
-            title="Test",
-            description="Test",
-            confidence=1.5,  # > 1.0
-        )
+        ReviewIssue(**_ISSUE_DEFAULTS, confidence=1.5)  # > 1.0
 
 
 def test_file_review_creation():
@@ -94,6 +82,31 @@ def test_pr_review_score_validation():
         )
 
 
+def test_pr_review_from_file_reviews():
+    """Test that from_file_reviews counts issues and scores the PR."""
+    def issue(severity):
+        return ReviewIssue(**{**_ISSUE_DEFAULTS, "severity": severity})
+
+    file_reviews = [
+        FileReview(
+            file_path="test.py",
+            language="python",
+            issues=[issue(Severity.CRITICAL), issue(Severity.WARNING)],
+        ),
+        FileReview(file_path="app.js", language="javascript", issues=[issue(Severity.INFO)]),
+    ]
+    review = PRReview.from_file_reviews(file_reviews, pr_number=7, repo_full_name="owner/repo")
+    assert review.pr_number == 7
+    assert review.total_issues == 3
+    assert review.critical_count == 1
+    assert review.warning_count == 1
+    assert review.overall_score == 7.2  # 10 - 2.0 - 0.5 - 3 * 0.1
+
+    empty = PRReview.from_file_reviews([])
+    assert empty.total_issues == 0
+    assert empty.overall_score == 10.0
+
+
 def test_diff_chunk_creation():
     """Test creating a DiffChunk."""
     chunk = DiffChunk(
@@ -109,3 +122,22 @@ def test_diff_chunk_creation():
     assert chunk.old_start == 10
     assert chunk.new_start == 15
     assert len(chunk.context_lines) == 0  # default empty
+
+
+def test_diff_chunk_data_to_model():
+    """Test that DiffChunkData is immutable and converts to a DiffChunk."""
+    data = DiffChunkData(
+        file_path="test.py",
+        language="python",
+        old_start=10,
+        new_start=15,
+        content="test content",
+        added_lines=("line 1",),
+    )
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        data.language = "ruby"
+
+    chunk = data.to_model()
+    assert isinstance(chunk, DiffChunk)
+    assert chunk.added_lines == ["line 1"]
+    assert chunk.context_lines == []
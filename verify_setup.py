@@ -1,13 +1,23 @@
 """Helper script to verify the project setup and run a smoke test."""
 
 import sys
-import os
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
 from pathlib import Path
 
-def print_status(message, status):
+REQUIRED_MODULES = ("fastapi", "uvicorn", "httpx", "pydantic", "pydantic_settings", "github", "groq")
+
+# Checks run concurrently; keep each status line (and its hint) in one piece
+_print_lock = threading.Lock()
+
+def print_status(message, status, hint=None):
     symbol = "✅" if status else "❌"
-    print(f"{symbol} {message}")
+    with _print_lock:
+        print(f"{symbol} {message}")
+        if hint:
+            print(f"   {hint}")
 
 def check_python_version():
     version = sys.version_info
@@ -16,37 +26,56 @@ def check_python_version():
     return is_valid
 
 def check_dependencies():
-    try:
-        import fastapi
-        import uvicorn
-        import httpx
-        import pydantic
-        import pydantic_settings
-        import github
-        import groq
-        print_status("Dependencies installed", True)
-        return True
-    except ImportError as e:
-        print_status(f"Dependencies missing: {e.name}", False)
-        print("   Run: pip install -r requirements.txt")
+    # find_spec only locates the modules; importing them would run their
+    # (slow) module bodies just to check that they exist
+    missing = [name for name in REQUIRED_MODULES if find_spec(name) is None]
+    if missing:
+        print_status(
+            f"Dependencies missing: {', '.join(missing)}", False,
+            hint="Run: pip install -r requirements.txt",
+        )
         return False
+    print_status("Dependencies installed", True)
+    return True
 
-def check_env_file():
-    exists = os.path.exists(".env")
-    print_status(".env file exists", exists)
-    if not exists:
-        print("   Run: copy .env.example .env (Windows) or cp .env.example .env (Linux/Mac)")
+def _load_env():
+    """Read .env into a dict in one open, or return None if it doesn't exist."""
+    try:
+        # Undecodable bytes (e.g. a UTF-16 file from a Windows shell) must not
+        # stop the existence check; such keys just won't match
+        with open(".env", encoding="utf-8", errors="replace") as f:
+            env = {}
+            for line in f:
+                line = line.strip()
+                if "=" not in line or line.startswith("#"):
+                    continue
+                # Accept shell-style "export KEY=value" and spaces around "="
+                line = line.removeprefix("export ")
+                key, value = line.split("=", 1)
+                env[key.strip()] = value.strip()
+            return env
+    except FileNotFoundError:
+        return None
+    except OSError:
+        # The file is there but unreadable
+        return {}
+
+def check_env_file(env):
+    exists = env is not None
+    print_status(
+        ".env file exists", exists,
+        hint=None if exists else "Run: copy .env.example .env (Windows) or cp .env.example .env (Linux/Mac)",
+    )
     return exists
 
-def check_api_keys():
-    if not os.path.exists(".env"):
+def check_api_keys(env):
+    if env is None:
         return False
-    
-    with open(".env") as f:
-        content = f.read()
-    
-    has_groq = "GROQ_API_KEY" in content and "your_groq_api_key_here" not in content
-    has_github = "GITHUB_TOKEN" in content and "your_github_pat_here" not in content
+
+    groq_key = env.get("GROQ_API_KEY", "")
+    github_token = env.get("GITHUB_TOKEN", "")
+    has_groq = bool(groq_key) and "your_groq_api_key_here" not in groq_key
+    has_github = bool(github_token) and "your_github_pat_here" not in github_token
     
     print_status("GROQ_API_KEY configured", has_groq)
     print_status("GITHUB_TOKEN configured", has_github)
@@ -54,37 +83,36 @@ def check_api_keys():
     return has_groq and has_github
 
 def run_tests():
-    print("\nRunning unit tests...")
-    try:
-        # Run pytest and capture output
-        result = subprocess.run(
-            ["pytest", "tests/", "-v"], 
-            capture_output=True, 
-            text=True
-        )
-        if result.returncode == 0:
-            print_status("All unit tests passed", True)
-            return True
-        else:
-            print_status("Unit tests failed", False)
-            print(result.stdout)
-            print(result.stderr)
-            return False
-    except FileNotFoundError:
-        print_status("pytest not found", False)
-        print("   Run: pip install -r requirements-dev.txt")
+    with _print_lock:
+        print("\nRunning unit tests...", flush=True)
+    # pytest writes straight to our stdout/stderr, so its output
+    # shows up live instead of being buffered until it exits
+    returncode = subprocess.call([sys.executable, "-m", "pytest", "tests/", "-v"])
+    if returncode == 0:
+        print_status("All unit tests passed", True)
+        return True
+    elif find_spec("pytest") is None:
+        print_status("pytest not found", False, hint="Run: pip install -r requirements-dev.txt")
+        return False
+    else:
+        print_status(f"Unit tests failed (exit code {returncode})", False)
         return False
 
 def main():
     print("🔍 Verifying AI Code Review Agent Setup...\n")
     
-    checks = [
-        check_python_version(),
-        check_dependencies(),
-        check_env_file(),
-        # check_api_keys(), # Optional, user might not have them yet
-        run_tests()
-    ]
+    env = _load_env()
+
+    # The quick checks finish while the test run is still going
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [
+            executor.submit(check_python_version),
+            executor.submit(check_dependencies),
+            executor.submit(check_env_file, env),
+            # executor.submit(check_api_keys, env), # Optional, user might not have them yet
+            executor.submit(run_tests),
+        ]
+        checks = [f.result() for f in futures]
     
     print("\n" + "="*50)
     if all(checks):